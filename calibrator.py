@@ -4,6 +4,7 @@ from os import path, makedirs
 import cvui
 import numpy as np
 from cv2 import cv2
+from camera_utils.camera_frame import image_of, offset_of
 from camera_utils.utils.colors import Color
 from camera_utils.utils.observer import ObservationEvent
 from camera_utils.utils.subject import Subject
@@ -73,10 +74,14 @@ class Calibrator(Subject):
         self.visibility_bound_points = []
         self.visibility_mask_vertices = []
         self.visibility_mask = None
+        self.scaled_visibility_mask = None
         self.visibility_rect = Rect()
         
         # Perspective
         self.perspective_matrix = None
+        
+        # Incremented on every change of calibration graphics.
+        self.version = 0
         self.__load_points()
     
     @property
@@ -92,6 +97,19 @@ class Calibrator(Subject):
         """ Return clipped area size. """
         return self.width * self.height
     
+    @property
+    def capture_rect(self):
+        """ Returns (x, y, right, bottom) bounds of clip and visibility areas, or None if area is not calibrated. """
+        if not self.has_clip_area:
+            return None
+        
+        # One pixel margin keeps interpolation at the area edges sampling real pixels.
+        x = min(self.clip_rect.x, self.visibility_rect.x) - 1
+        y = min(self.clip_rect.y, self.visibility_rect.y) - 1
+        right = max(self.clip_rect.w, self.visibility_rect.w) + 1
+        bottom = max(self.clip_rect.h, self.visibility_rect.h) + 1
+        return x, y, right, bottom
+    
     @property
     def clip_size(self):
         """ Returns size of the clipped rectangle. """
@@ -118,7 +136,7 @@ class Calibrator(Subject):
             camera.is_paused = True
         
         self.edit_mode = True
-        self.frame = frame
+        self.frame = image_of(frame)
     
     def stop_editing(self):
         """ Exit from edit mode. """
@@ -143,6 +161,7 @@ class Calibrator(Subject):
                                    [clip_width - vis_x, clip_height - vis_y],
                                    [clip_width - vis_x, clip_y - vis_y]]], dtype=np.int32)
         self.visibility_mask = cv2.fillPoly(frame_mask, mask_vertices, 255)
+        self.scaled_visibility_mask = None
     
     @classmethod
     def calculate(cls, points):
@@ -169,6 +188,7 @@ class Calibrator(Subject):
         self.clip_rect = Rect(x_clip, y_clip, w_clip, h_clip)
         self.visibility_rect = Rect(x_vis, y_vis, w_vis, h_vis)
         self.compute_perspective_matrix()
+        self.version += 1
         print('[CALIBRATOR] Recalculating calibration area.')
     
     def compute_perspective_matrix(self):
@@ -188,10 +208,31 @@ class Calibrator(Subject):
                                          [0, vis_height - vis_y]])
         self.perspective_matrix = cv2.getPerspectiveTransform(source_points, destination_points)
     
-    def transform_perspective(self, frame):
+    def transform_perspective(self, frame, scale=1.0):
         """ Transform perspective of the given frame according to visibility points. """
+        offset_x, offset_y = offset_of(frame)
+        frame = image_of(frame)
         vis_x, vis_y, vis_width, vis_height = self.visibility_rect.expand()
-        return cv2.warpPerspective(frame, self.perspective_matrix, (vis_width - vis_x, vis_height - vis_y))
+        
+        if scale == 1.0 and offset_x == 0 and offset_y == 0:
+            return cv2.warpPerspective(frame, self.perspective_matrix, (vis_width - vis_x, vis_height - vis_y))
+        
+        # Shifting source space accounts for capture cropping, scaling destination space lets warp
+        # write the reduced resolution output directly.
+        shift = np.array([[1, 0, offset_x], [0, 1, offset_y], [0, 0, 1]], dtype=np.float64)
+        matrix = np.diag([scale, scale, 1.0]) @ self.perspective_matrix @ shift
+        size = (max(1, int((vis_width - vis_x) * scale)), max(1, int((vis_height - vis_y) * scale)))
+        return cv2.warpPerspective(frame, matrix, size)
+    
+    def map_clipped(self, x, y, scale=1.0):
+        """ Map point of the (scaled) clipped frame back to full resolution frame coordinates. """
+        return x / scale + self.clip_rect.x, y / scale + self.clip_rect.y
+    
+    def map_transformed(self, x, y, scale=1.0):
+        """ Map point of the (scaled) perspective transformed frame back to full resolution frame coordinates. """
+        point = np.float32([[[x / scale, y / scale]]])
+        mapped = cv2.perspectiveTransform(point, np.linalg.inv(self.perspective_matrix))
+        return float(mapped[0][0][0]), float(mapped[0][0][1])
     
     def set_point_callback(self, event, x, y, flags, param):
         """ Fired upon double click on the image. """
@@ -202,34 +243,70 @@ class Calibrator(Subject):
             if len(self.clip_points) < 4:
                 self.clip_points.append(Point(x, y))
                 self.visibility_bound_points.append(Point(x, y))
+                self.version += 1
             
             if len(self.clip_points) == 4:
                 self.stop_editing()
                 self.notify_all(ObservationEvent.CALIBRATION_DONE)
     
-    def get_clipped(self, frame, copy=False):
+    def get_clipped(self, frame, copy=False, scale=1.0):
         """ Return partial frame clipped from defined rectangle. If no clipping points were set, return full frame. """
+        offset_x, offset_y = offset_of(frame)
+        frame = image_of(frame)
         clipped_frame = frame
         
         try:
-            clipped_frame = frame[self.clip_rect.y:self.clip_rect.h, self.clip_rect.x:self.clip_rect.w]
+            clipped_frame = frame[max(self.clip_rect.y - offset_y, 0):self.clip_rect.h - offset_y,
+                                  max(self.clip_rect.x - offset_x, 0):self.clip_rect.w - offset_x]
         except (Exception, IndexError) as _:
             traceback.print_exc()
         finally:
-            if isinstance(clipped_frame, np.ndarray) and clipped_frame.any():
-                return clipped_frame.copy() if copy else clipped_frame
+            if not isinstance(clipped_frame, np.ndarray) or not clipped_frame.size:
+                clipped_frame = frame
+            
+            if scale != 1.0:
+                return cv2.resize(clipped_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
-            return frame.copy() if copy else frame
+            return clipped_frame.copy() if copy else clipped_frame
     
     def get_masked(self, frame):
         """ Return masked image if mask area is defined. """
+        frame = image_of(frame)
+        
         if isinstance(self.visibility_mask, np.ndarray):
-            return cv2.copyTo(frame, mask=self.visibility_mask)
+            return cv2.copyTo(frame, mask=self.get_visibility_mask(frame.shape[:2]))
+    
+    def get_visibility_mask(self, shape):
+        """ Return visibility mask resized to the given frame shape. """
+        if self.visibility_mask.shape == shape:
+            return self.visibility_mask
+        
+        if self.scaled_visibility_mask is None or self.scaled_visibility_mask.shape != shape:
+            height, width = shape
+            self.scaled_visibility_mask = cv2.resize(self.visibility_mask, (width, height),
+                                                     interpolation=cv2.INTER_NEAREST)
+        
+        return self.scaled_visibility_mask
+    
+    @property
+    def overlay_key(self):
+        """ Returns value identifying current state of static calibration graphics. """
+        return self.version, self.edit_mode, len(self.clip_points)
     
-    def update(self, frame, show_clip_area=False):
-        """ Display clipping points in edit mode. """
+    def update(self, frame, show_clip_area=False, draw_static=True):
+        """ Display clipping points in edit mode. Static graphics can be skipped if they are composited separately. """
+        frame = image_of(frame)
         cvui.context(self.window_name)
         
+        if draw_static:
+            self.draw_overlay(frame, show_clip_area)
+        
+        if show_clip_area and len(self.clip_points) == 4:
+            self.show_markers(frame)
+            cvui.update()
+    
+    def draw_overlay(self, frame, show_clip_area=False):
+        """ Draw static calibration graphics, which only change together with calibration state. """
         if self.edit_mode:
             h = frame.shape[0]
             cv2.putText(frame, "Calibrating mode", (10, h - 20), cv2.FONT_HERSHEY_PLAIN, 2, Color.GREEN.value, 1)
@@ -237,14 +314,14 @@ class Calibrator(Subject):
             for point in self.clip_points:
                 cv2.circle(frame, (point.x, point.y), 5, Color.GREEN.value, 2)
         
-        if show_clip_area:
-            clip_point_count = len(self.clip_points)
-            
-            if clip_point_count != 4:
-                return
-            
-            self.show_markers(frame)
-            cvui.update()
+        if show_clip_area and len(self.clip_points) == 4:
+            self.draw_bounds(frame, self.clip_points, Color.GREEN.value)
+            self.draw_bounds(frame, self.visibility_bound_points, Color.LIGHT_BLUE.value)
+            # Not antialiased, edge pixels blended with black layer background would show as dark halo.
+            cv2.rectangle(frame, (self.clip_rect.x, self.clip_rect.y), (self.clip_rect.w, self.clip_rect.h),
+                          Color.RED.value, 2)
+            cv2.rectangle(frame, (self.visibility_rect.x, self.visibility_rect.y),
+                          (self.visibility_rect.w, self.visibility_rect.h), Color.LIGHT_RED.value, 2)
     
     @classmethod
     def draw_bounds(cls, frame, points, line_color):
@@ -276,14 +353,6 @@ class Calibrator(Subject):
         frame_height, frame_width = frame.shape[:2]
         point_count = len(self.clip_points)
         
-        # Actual bounding box.
-        self.draw_bounds(frame, self.clip_points, Color.GREEN.value)
-        self.draw_bounds(frame, self.visibility_bound_points, Color.LIGHT_BLUE.value)
-        cv2.rectangle(frame, (self.clip_rect.x, self.clip_rect.y), (self.clip_rect.w, self.clip_rect.h),
-                      Color.RED.value, 2, cv2.LINE_AA)
-        cv2.rectangle(frame, (self.visibility_rect.x, self.visibility_rect.y),
-                      (self.visibility_rect.w, self.visibility_rect.h), Color.LIGHT_RED.value, 2, cv2.LINE_AA)
-        
         # Clip points
         for i in range(point_count):
             x, y = self.clip_points[i].tuple
@@ -3,6 +3,7 @@ from os import path
 import numpy as np
 from cv2 import cv2
 
+from camera_utils.camera_frame import Frame, image_of
 from camera_utils.utils.colors import Color
 from camera_utils.utils.observer import Observer, ObservationEvent
 
@@ -12,6 +13,7 @@ class CameraAdapter(Observer):
         self.camera = camera
         self.frame = None
         self.depth_frame = None
+        self.record = Frame(False, None)
         self.is_paused = False
         self.is_still = is_still
         self.settings_path = '../data'
@@ -23,28 +25,31 @@ class CameraAdapter(Observer):
         self.load_background()
     
     def read(self):
-        """ Read and return next frame. """
+        """ Read and return next frame record. """
         if self.is_still:
-            success, frame, self.depth_frame = self.camera.read()
+            record = Frame.wrap(self.camera.read())
+            self.depth_frame = record.depth
             
-            if success:
-                self.frame = frame
+            if record.success:
+                self.frame = record.image
+                self.record = record
             
-            return success, self.frame.copy(), None
+            return record.replace(image=self.frame.copy(), depth=None)
         
         if not self.is_paused:
-            _, self.frame, self.depth_frame = self.camera.read()
+            self.record = Frame.wrap(self.camera.read())
+            self.frame, self.depth_frame = self.record.image, self.record.depth
         
         if not isinstance(self.frame, np.ndarray):
             # self.is_paused = True
-            return False, np.zeros((self.camera.width, self.camera.height, 3), np.uint8), None
+            return self.record.replace(success=False, image=self.camera.empty_frame().copy(), depth=None, offset=(0, 0))
         
-        return True, self.frame.copy(), self.depth_frame
+        return self.record.replace(success=self.record.success or self.is_paused, image=self.frame.copy())
     
     def handle_event(self, event):
         """ Handle events received from subject. """
         if event == ObservationEvent.SAVE_BACKGROUND:
-            self.save_background(self.frame)
+            self.save_background(self.record)
         elif event == ObservationEvent.CALIBRATION_DONE:
             self.is_paused = False
     
@@ -55,16 +60,26 @@ class CameraAdapter(Observer):
         if not path.exists(background_path):
             return
         
-        self.background_img = cv2.imread(background_path)
+        # Keep background in the same format as camera frames (e.g. single channel IR).
+        self.background_img = cv2.imread(background_path, cv2.IMREAD_UNCHANGED)
     
     def save_background(self, frame):
         """ Save current frame. """
         background_path = path.join(self.settings_path, self.background_name)
-        frame = self.calibrator.get_clipped(frame, copy=True) if self.calibrator else frame
+        frame = self.calibrator.get_clipped(frame, copy=True) if self.calibrator else image_of(frame)
         cv2.imwrite(background_path, frame)
 
     def update(self, frame):
         """ Display camera related info on the frame. """
+        self.draw_overlay(frame)
+    
+    @property
+    def overlay_key(self):
+        """ Returns value identifying current state of camera info graphics. """
+        return self.is_paused
+    
+    def draw_overlay(self, frame):
+        """ Draw camera related info. """
         if self.is_paused:
             h, w = frame.shape[:2]
             cv2.putText(frame, "Paused", (w - 150, h - 20), cv2.FONT_HERSHEY_PLAIN, 2, Color.RED.value, 1)
@@ -1,11 +1,89 @@
+import numpy as np
+
+from camera_utils.camera_frame import Frame
+
+
 class Capture:
-    def __init__(self, width, height):
+    def __init__(self, width, height, source_id=None, channels=3):
         self.width = width
         self.height = height
+        self.channels = channels
+        self.source_id = source_id if source_id is not None else type(self).__name__
+        self.sequence = 0
+        self.blank_frame = None
+        self.roi = None
+        self.roi_buffers = []
+        self.roi_buffer_count = 1
+        self.roi_index = 0
+    
+    @property
+    def shape(self):
+        """ Returns shape of frames in native format. """
+        if self.channels == 1:
+            return self.height, self.width
+        
+        return self.height, self.width, self.channels
+    
+    def empty_frame(self):
+        """ Returns blank frame in native format. Allocated once and reused. """
+        if self.blank_frame is None or self.blank_frame.shape != self.shape:
+            self.blank_frame = np.zeros(self.shape, np.uint8)
+        
+        return self.blank_frame
     
     def read(self):
         pass
     
+    def set_roi(self, rect):
+        """ Crop captured frames to (x, y, right, bottom) region right after decoding. None restores full frames. """
+        if rect is None:
+            self.roi = None
+            return
+        
+        x, y, right, bottom = rect
+        x, y, right, bottom = max(int(x), 0), max(int(y), 0), int(right), int(bottom)
+        
+        if self.width > 0 and self.height > 0:
+            # Frame size is unknown until the stream was opened, crop() clamps the region anyway.
+            right, bottom = min(right, self.width), min(bottom, self.height)
+        
+        self.roi = (x, y, right, bottom) if right > x and bottom > y else None
+    
+    def crop(self, image):
+        """ Copy region of interest into preallocated buffer. Returns image and its offset in full frame. """
+        roi = self.roi
+        
+        if roi is None or image is None:
+            return image, (0, 0)
+        
+        x, y, right, bottom = roi
+        region = image[y:bottom, x:right]
+        
+        # Several buffers are rotated when frames are handed over between threads.
+        index = self.roi_index % self.roi_buffer_count
+        self.roi_index += 1
+        
+        if len(self.roi_buffers) <= index:
+            self.roi_buffers.append(None)
+        
+        buffer = self.roi_buffers[index]
+        
+        if buffer is None or buffer.shape != region.shape or buffer.dtype != region.dtype:
+            buffer = self.roi_buffers[index] = np.empty_like(region)
+        
+        np.copyto(buffer, region)
+        return buffer, (x, y)
+    
+    def make_frame(self, success, image, depth=None, timestamp=None, dropped=0):
+        """ Wrap captured image into frame record with next sequence number. Image is cropped to ROI if set. """
+        offset = (0, 0)
+        
+        if success:
+            self.sequence += 1
+            image, offset = self.crop(image)
+        
+        return Frame(success, image, depth, timestamp, self.sequence, self.source_id, dropped, offset)
+    
     def release(self):
         pass
     
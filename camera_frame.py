@@ -0,0 +1,96 @@
+import time
+
+
+class Frame:
+    __slots__ = ('success', 'image', 'depth', 'timestamp', 'sequence', 'source_id', 'dropped', 'offset')
+    
+    def __init__(self, success, image, depth=None, timestamp=None, sequence=0, source_id=None, dropped=0,
+                 offset=(0, 0)):
+        self.success = success
+        self.image = image
+        self.depth = depth
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.sequence = sequence
+        self.source_id = source_id
+        self.dropped = dropped
+        # Position of the image origin in full resolution frame (non zero if cropped at capture).
+        self.offset = offset
+    
+    @classmethod
+    def wrap(cls, result):
+        """ Return frame record for legacy (success, frame, depth) tuple. Records are returned as is. """
+        if isinstance(result, Frame):
+            return result
+        
+        success, image, depth = result
+        return cls(success, image, depth)
+    
+    @property
+    def age(self):
+        """ Returns seconds elapsed since frame was captured. """
+        return time.monotonic() - self.timestamp
+    
+    def replace(self, **fields):
+        """ Return copy of the record with given fields replaced. """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(fields)
+        return Frame(**values)
+    
+    def __iter__(self):
+        """ Allows unpacking as (success, frame, depth) tuple. """
+        return iter((self.success, self.image, self.depth))
+    
+    def __len__(self):
+        return 3
+    
+    def __getitem__(self, index):
+        return (self.success, self.image, self.depth)[index]
+    
+    def __repr__(self):
+        return f"Frame(source={self.source_id}, sequence={self.sequence}, success={self.success}, " \
+               f"dropped={self.dropped}, age={self.age:.3f})"
+
+
+def image_of(frame):
+    """ Returns pixel buffer of the frame record or the frame itself if it is a plain image. """
+    return frame.image if isinstance(frame, Frame) else frame
+
+
+def offset_of(frame):
+    """ Returns full resolution position of the frame origin. Plain images are assumed to be full frames. """
+    return frame.offset if isinstance(frame, Frame) else (0, 0)
+
+
+class FrameStats:
+    def __init__(self, smoothing=0.05):
+        self.smoothing = smoothing
+        self.frames = 0
+        self.dropped = 0
+        self.average_age = None
+        self.max_age = 0
+        self.last_sequences = {}
+    
+    def record(self, frame, now=None):
+        """ Account capture-to-output age and gaps of the delivered frame. """
+        if not isinstance(frame, Frame) or not frame.success:
+            return
+        
+        last_sequence = self.last_sequences.get(frame.source_id)
+        
+        if last_sequence is not None and frame.sequence <= last_sequence:
+            return
+        
+        now = time.monotonic() if now is None else now
+        age = now - frame.timestamp
+        gap = frame.dropped if last_sequence is None else max(frame.sequence - last_sequence - 1, frame.dropped)
+        self.last_sequences[frame.source_id] = frame.sequence
+        self.frames += 1
+        self.dropped += gap
+        self.max_age = max(self.max_age, age)
+        self.average_age = age if self.average_age is None else \
+            self.average_age + self.smoothing * (age - self.average_age)
+    
+    def __str__(self):
+        average_age = (self.average_age or 0) * 1000
+        return f"frames: {self.frames}, dropped: {self.dropped}, " \
+               f"age: {average_age:.1f} ms (max {self.max_age * 1000:.1f} ms)"
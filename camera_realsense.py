@@ -32,8 +32,8 @@ class DepthFramePostProcessor:
 
 
 class RealSenseCamera(Capture):
-    def __init__(self, width, height, fps=60, infrared=False, depth=False):
-        super(RealSenseCamera, self).__init__(width, height)
+    def __init__(self, width, height, fps=60, infrared=False, depth=False, source_id=None):
+        super(RealSenseCamera, self).__init__(width, height, source_id, 1 if infrared else 3)
         self.width = width
         self.height = height
         self.fps = fps
@@ -83,9 +83,9 @@ class RealSenseCamera(Capture):
         depth_frame = DepthFramePostProcessor.process(depth_frame)
         
         if not color_frame:
-            return False, np.zeros((self.width, self.height, 3), np.uint8), depth_frame
+            return self.make_frame(False, self.empty_frame(), depth_frame)
         
-        return True, np.asanyarray(color_frame.get_data()), depth_frame
+        return self.make_frame(True, np.asanyarray(color_frame.get_data()), depth_frame)
     
     def release(self):
         super(RealSenseCamera, self).release()
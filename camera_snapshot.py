@@ -4,16 +4,16 @@ from camera_utils.camera_capture import Capture
 
 
 class SnapshotCamera(Capture):
-    def __init__(self, stream_uri):
-        self.frame = cv2.imread(stream_uri)
+    def __init__(self, stream_uri, source_id=None, grayscale=False):
+        self.frame = cv2.imread(stream_uri, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
         height, width = self.frame.shape[:2]
         self.width = width
         self.height = height
-        super(SnapshotCamera, self).__init__(self.width, self.height)
+        super(SnapshotCamera, self).__init__(self.width, self.height, source_id, 1 if grayscale else 3)
     
     def read(self):
         super(SnapshotCamera, self).read()
-        return True, self.frame, None
+        return self.make_frame(True, self.frame)
     
     def release(self):
         super(SnapshotCamera, self).release()
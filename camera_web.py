@@ -7,22 +7,63 @@ from camera_utils.camera_capture import Capture
 
 
 class WebCamera(Capture):
-    def __init__(self, stream_uri):
-        self.capture = cv2.VideoCapture(stream_uri) if stream_uri is not None else None
-        self.width = int(self.capture.get(3))
-        self.height = int(self.capture.get(4))
-        super(WebCamera, self).__init__(self.width, self.height)
+    def __init__(self, stream_uri, source_id=None, pixel_format='bgr', lazy_open=False):
+        """ Pixel format is one of 'bgr', 'gray' (mono / IR sensors) or 'yuyv' (luma plane is kept). """
+        self.stream_uri = stream_uri
+        self.pixel_format = pixel_format
+        # With lazy open, capture is opened later and frame size stays 0 until update_size.
+        self.capture = self.open_capture() if stream_uri is not None and not lazy_open else None
+        super(WebCamera, self).__init__(0, 0, source_id, 3 if pixel_format == 'bgr' else 1)
+        
+        if self.capture is not None:
+            self.update_size(self.capture)
+    
+    def update_size(self, capture):
+        """ Refresh frame size from opened capture (stream may have been unavailable when camera was created). """
+        width, height = int(capture.get(3)), int(capture.get(4))
+        
+        if width > 0 and height > 0:
+            self.width, self.height = width, height
+    
+    def open_capture(self):
+        """ Open video capture for the stream uri. Can be overridden to supply another capture source. """
+        capture = cv2.VideoCapture(self.stream_uri)
+        
+        if self.pixel_format != 'bgr':
+            # Deliver frames as captured instead of expanding them to BGR.
+            capture.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        
+        return capture
+    
+    def convert(self, frame):
+        """ Bring decoded frame to native single channel format (if not capturing BGR). """
+        if self.pixel_format == 'bgr' or frame is None:
+            return frame
+        
+        if self.pixel_format == 'yuyv' and frame.size == self.height * self.width * 2:
+            # Raw packed buffer, anything else was already decoded by the backend.
+            frame = frame.reshape(self.height, self.width, 2)
+        
+        if frame.ndim == 3 and frame.shape[2] == 2:
+            # Packed YUV 4:2:2, luma is every other byte.
+            return cv2.extractChannel(frame, 0)
+        
+        if frame.ndim == 3:
+            # Backend ignored raw format request.
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        
+        return frame
     
     def read(self):
         super(WebCamera, self).read()
         success, frame = self.capture.read()
-        return success, frame, None
+        return self.make_frame(success, self.convert(frame))
     
     def record(self, length, fps, size, output=None):
         default_dir = 'data/recordings'
         codec = cv2.VideoWriter_fourcc(*'XVID')
         filename = '{}/{}.avi'.format(default_dir, str(datetime.datetime.now()))
-        video_writer = cv2.VideoWriter(filename, codec, fps, size)
+        video_writer = cv2.VideoWriter(filename, codec, fps, size, self.channels != 1)
         
         if length <= 0:
             raise ValueError('Invalid video recording length.')
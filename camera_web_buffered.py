@@ -1,40 +1,193 @@
 import threading
-from _queue import Empty
-from queue import Queue
+import time
+from queue import Empty, Queue
 
+from camera_utils.camera_frame import Frame
 from camera_utils.camera_web import WebCamera
+from camera_utils.utils.profiler import profiler
 
 
 class BufferedWebCamera(WebCamera):
-    def __init__(self, stream_uri):
-        super(BufferedWebCamera, self).__init__(stream_uri)
-        self.buffer = Queue()
+    def __init__(self, stream_uri, read_timeout=0.5, stall_timeout=5.0, min_backoff=0.5, max_backoff=30.0,
+                 source_id=None, pixel_format='bgr'):
+        # Capture is opened by the reader thread, so unreachable stream does not block the constructor.
+        super(BufferedWebCamera, self).__init__(stream_uri, source_id, pixel_format, lazy_open=True)
+        self.read_timeout = read_timeout
+        self.stall_timeout = stall_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.buffer = Queue(maxsize=1)
+        # Cropped frame can be queued, held by reader and by consumer at the same time.
+        self.roi_buffer_count = 3
+        self.buffer_lock = threading.Lock()
+        self.last_frame = None
+        self.last_read_sequence = 0
+        self.last_frame_time = None
+        self.frame_interval = None
+        self.blocked_since = None
+        self.backoff_until = 0
+        self.reader_started = 0
+        self.stall_restarts = 0
+        self.reconnects = 0
+        self.generation = 0
         self.thread_stop = threading.Event()
-        self.thread = threading.Thread(target=self.fill_buffer, args=(self.thread_stop,))
+        self.thread = None
+        self.start_reader()
+        self.watchdog = threading.Thread(target=self.watch, args=(self.thread_stop,))
+        self.watchdog.daemon = True
+        self.watchdog.start()
+    
+    @property
+    def frame_age(self):
+        """ Returns seconds since last frame was received (None if no frame arrived yet). """
+        if self.last_frame_time is None:
+            return None
+        
+        return time.monotonic() - self.last_frame_time
+    
+    @property
+    def is_stale(self):
+        """ Check whether stream did not deliver frames for longer than expected. """
+        age = self.frame_age
+        
+        if age is None:
+            return True
+        
+        return age > max(self.read_timeout, 3 * (self.frame_interval or 0))
+    
+    def start_reader(self, capture=None):
+        """ Start new reader thread. Any previous reader is abandoned and exits once its blocking call returns. """
+        self.generation += 1
+        self.blocked_since = None
+        self.backoff_until = 0
+        self.reader_started = time.monotonic()
+        self.thread = threading.Thread(target=self.fill_buffer, args=(self.thread_stop, self.generation, capture),
+                                       name=f'{self.source_id}-reader-{self.generation}')
         self.thread.daemon = True
         self.thread.start()
     
-    def fill_buffer(self, stop_event):
-        while not stop_event.is_set():
-            success, frame = self.capture.read()
+    def backoff(self, attempt):
+        """ Returns reconnect delay for given attempt number. """
+        return min(self.min_backoff * 2 ** min(attempt, 16), self.max_backoff)
+    
+    def fill_buffer(self, stop_event, generation, capture=None):
+        attempt = 0
+        
+        while not stop_event.is_set() and generation == self.generation:
+            if capture is None:
+                self.blocked_since = time.monotonic()
+                capture = self.open_capture()
+                
+                if generation != self.generation:
+                    break
+                
+                self.blocked_since = None
+                self.capture = capture
+                self.update_size(capture)
             
-            if not success:
+            self.blocked_since = time.monotonic()
+            
+            with profiler.span('capture.read'):
+                success, frame = capture.read()
+            
+            if generation != self.generation:
                 break
-            if not self.buffer.empty():
-                try:
-                    self.buffer.get_nowait()
-                except Empty:
-                    pass
+            
+            self.blocked_since = None
+            
+            if not success:
+                capture.release()
+                capture = None
+                delay = self.backoff(attempt)
+                attempt += 1
+                self.reconnects += 1
+                self.backoff_until = time.monotonic() + delay
+                print(f'[CAMERA] Failed to read frame, reconnect #{self.reconnects} in {delay:.1f}s.')
+                
+                if stop_event.wait(delay):
+                    break
+                
+                continue
+            
+            attempt = 0
+            self.put_frame(self.make_frame(True, self.convert(frame)))
         
-            self.buffer.put(frame)
+        if capture is not None:
+            capture.release()
     
-    def read(self):
-        if self.buffer.not_empty:
-            return True, self.buffer.get(), None
+    def put_frame(self, frame):
+        """ Replace buffered frame with the newest one and update arrival statistics. """
+        now = frame.timestamp
+        
+        if self.last_frame_time is not None:
+            interval = now - self.last_frame_time
+            self.frame_interval = interval if self.frame_interval is None else \
+                self.frame_interval + 0.1 * (interval - self.frame_interval)
+        
+        self.last_frame_time = now
+        self.last_frame = frame
+        self.stall_restarts = 0
+        
+        with self.buffer_lock:
+            try:
+                self.buffer.get_nowait()
+            except Empty:
+                pass
+            
+            self.buffer.put_nowait(frame)
+    
+    def watch(self, stop_event):
+        """ Restart reader if it died, is stuck inside a blocking capture call or stopped delivering frames. """
+        while not stop_event.wait(min(self.stall_timeout / 4, 1.0)):
+            reason = self.stall_reason()
+            
+            if reason is None:
+                continue
+            
+            self.stall_restarts += 1
+            self.reconnects += 1
+            print(f'[CAMERA] {reason}, reopening capture (reconnect #{self.reconnects}).')
+            self.start_reader()
+    
+    def stall_reason(self):
+        """ Returns description of the reader problem, or None if reader is healthy or waiting for reconnect. """
+        now = time.monotonic()
+        limit = min(self.stall_timeout * 2 ** min(self.stall_restarts, 16), self.max_backoff)
+        limit = max(limit, self.stall_timeout)
+        blocked_since = self.blocked_since
+        
+        if not self.thread.is_alive():
+            return 'Reader thread stopped'
+        
+        if blocked_since is not None:
+            return f'Stream blocked for {limit:.1f}s' if now - blocked_since > limit else None
+        
+        if now < self.backoff_until or not self.is_stale:
+            return None
+        
+        if now - max(self.last_frame_time or 0, self.reader_started, self.backoff_until) > limit:
+            return f'No frames for {limit:.1f}s'
+        
+        return None
+    
+    def read(self, timeout=None):
+        """ Return newest frame. If none arrives within timeout, last (stale) frame is returned with failed status. """
+        timeout = self.read_timeout if timeout is None else timeout
+        
+        try:
+            frame = self.buffer.get(timeout=timeout) if timeout > 0 else self.buffer.get_nowait()
+        except Empty:
+            if self.last_frame is None:
+                return Frame(False, None, source_id=self.source_id)
+            
+            return self.last_frame.replace(success=False, dropped=0)
         
-        return False, None, None
+        frame.dropped = frame.sequence - self.last_read_sequence - 1
+        self.last_read_sequence = frame.sequence
+        return frame
     
     def release(self):
         self.thread_stop.set()
-        self.thread.join()
-        super(BufferedWebCamera, self).release()
+        self.thread.join(self.read_timeout)
+        self.watchdog.join(self.read_timeout)
+        super(WebCamera, self).release()
@@ -1,12 +1,21 @@
 import argparse
+import time
 from enum import Enum
 
 from cvui import cvui, np
 from cv2 import cv2
 from camera_utils.calibrator import Calibrator
 from camera_utils.camera_adapter import CameraAdapter
+from camera_utils.camera_frame import image_of
+from camera_utils.camera_snapshot import SnapshotCamera
+from camera_utils.camera_web import WebCamera
 from camera_utils.camera_web_buffered import BufferedWebCamera
 from camera_utils.utils.keys import Keys
+from camera_utils.utils.motion import MotionGate
+from camera_utils.utils.overlay import DisplayThrottle, OverlayLayer, to_display
+from camera_utils.utils.pipeline import Pipeline, load_config
+from camera_utils.utils.profiler import profiler
+from camera_utils.utils.quality import DEFAULT_LADDER
 from camera_utils.utils.runner import Runner
 
 
@@ -14,35 +23,102 @@ class Windows(Enum):
     MAIN = 0
     CLIPPED = 1
 
+
+DEFAULT_CONFIG = {
+    'camera': {'type': 'buffered_web', 'stream_uri': 'rtsp://<username>:<password>@<ip address>'},
+    'windows': {'Masked frame': 'clip'},
+    'outputs': [],
+    'stages': {},
+}
+
 # python setup.py sdist bdist_wheel
 
 
 class CameraRunner(Runner):
-    def __init__(self):
-        super(CameraRunner, self).__init__()
-        self.arguments = self.parse_arguments()
+    def __init__(self, on_output=None):
+        """ Callback on_output(name, value) receives configured outputs whenever they are recomputed. """
+        arguments = self.parse_arguments()
+        super(CameraRunner, self).__init__(arguments.framerate or 60, adaptive_quality=arguments.adaptive_quality)
+        self.arguments = arguments
+        self.config = load_config(self.arguments.config, DEFAULT_CONFIG)
         self.calibrator = Calibrator(Windows.MAIN.name)
-        self.camera = BufferedWebCamera('rtsp://<username>:<password>@<ip address>')
-        # self.camera = SnapshotCamera(self.arguments.source)
-        # self.camera = RealSenseCamera(640, 480, fps=30)
+        self.camera = self.create_camera()
         self.camera_adapter = CameraAdapter(self.camera)
         self.calibrator.attach(self.camera_adapter)
+        self.motion_gate = MotionGate(refresh_interval=self.arguments.refresh_interval) \
+            if self.arguments.motion_gate else None
         self.frame = None
+        self.record = None
         self.depth_frame = None
-        self.create_windows()
+        self.on_output = on_output
+        # Outputs nobody receives are not computed, window stages are pulled only when display is refreshed.
+        self.sinks = list(self.config['outputs']) if on_output is not None else []
+        self.pipeline = self.create_pipeline()
+        self.results = None
+        self.calibration = None
+        self.overlay = OverlayLayer()
+        self.display = DisplayThrottle(self.arguments.display_fps)
+        
+        if not self.arguments.headless:
+            self.create_windows()
+        
+        profiler.install_signal()
     
     @classmethod
     def create_windows(cls):
         cvui.init(Windows.MAIN.name)
+    
+    def create_camera(self):
+        """ Create capture described in configuration. """
+        options = dict(self.config['camera'])
+        camera_type = options.pop('type', 'buffered_web')
+        
+        if camera_type == 'web':
+            return WebCamera(**options)
+        elif camera_type == 'buffered_web':
+            return BufferedWebCamera(**options)
+        elif camera_type == 'snapshot':
+            return SnapshotCamera(**options)
+        elif camera_type == 'realsense':
+            from camera_utils.camera_realsense import RealSenseCamera
+            return RealSenseCamera(**options)
+        
+        raise ValueError(f'Unknown camera type "{camera_type}".')
+    
+    def create_pipeline(self):
+        """ Register processing stages. Only stages consumed by outputs or displayed windows are computed. """
+        pipeline = Pipeline()
+        pipeline.add('clip', lambda frame: self.calibrator.get_clipped(frame, copy=True, scale=self.processing_scale))
+        pipeline.add('warp', lambda frame: self.calibrator.transform_perspective(frame, self.processing_scale))
+        pipeline.add('mask', self.calibrator.get_masked, ['warp'])
+        pipeline.add('background', self.get_background, [])
+        pipeline.add('encode', lambda frame: cv2.imencode('.jpg', image_of(frame))[1], ['clip'])
+        pipeline.configure(self.config['stages'])
+        pipeline.validate(self.sinks + list(self.config['windows'].values()))
+        return pipeline
 
     def parse_arguments(self):
         super(CameraRunner, self).parse_arguments()
         parser = argparse.ArgumentParser()
         parser.add_argument('--source', help='Path to the video stream or file.', default=0)
+        parser.add_argument('--config', help='Path to the pipeline configuration file.', default='data/pipeline.json')
         parser.add_argument('--headless', help='Hide debug windows.', action='store_const', const=True)
         parser.add_argument('--still', help='Processing still frame.', action='store_const', const=True)
         parser.add_argument('--host', help='Shapes data broadcast host.', action='store_const', const='localhost', default='localhost')
         parser.add_argument('--port', help='Shapes data broadcast port.', action='store_const', const=8000, default=8000)
+        parser.add_argument('--motion-gate', help='Skip processing of unchanged frames.', action='store_const', const=True)
+        parser.add_argument('--refresh-interval', help='Force processing every n-th frame when motion gate is on.',
+                            type=int, default=60)
+        parser.add_argument('--framerate', help='Target processing frame rate (unlimited if not set).', type=int)
+        parser.add_argument('--adaptive-quality', help='Degrade processing quality to hold target frame rate '
+                                                       '(60 fps if --framerate is not set).',
+                            action='store_const', const=True)
+        parser.add_argument('--display-fps', help='Maximum debug window refresh rate (0 for unlimited).', type=int,
+                            default=15)
+        parser.add_argument('--processing-scale', help='Resolution scale of clip/warp/mask outputs.', type=float,
+                            default=1.0)
+        parser.add_argument('--capture-roi', help='Crop frames to calibrated area at capture (headless only).',
+                            action='store_const', const=True)
         return parser.parse_args()
     
     def handle_input(self):
@@ -52,23 +128,140 @@ class CameraRunner(Runner):
             self.is_running = False
         elif self.key == Keys.C.value:
             self.calibrator.start_editing(self.frame, self.camera_adapter)
+        elif self.key == Keys.P.value:
+            profiler.toggle()
+        elif self.key == Keys.T.value and profiler.enabled:
+            profiler.export()
     
     def set_up(self):
         self.camera.record(300, 25, (1920, 1080))
     
+    def teardown(self):
+        super(CameraRunner, self).teardown()
+        profiler.stop()
+        print(f'[RUNNER] {self.frame_stats}')
+    
+    @property
+    def quality_level(self):
+        """ Returns active processing quality level. """
+        return self.quality.level if self.quality is not None else DEFAULT_LADDER[0]
+    
+    @property
+    def processing_scale(self):
+        """ Returns scale of processed outputs relative to full resolution calibration coordinates. """
+        return self.arguments.processing_scale * self.quality_level.scale
+    
+    def get_background(self):
+        """ Returns clipped background at processing scale. Saved background is stored already clipped. """
+        background = self.camera_adapter.background_img
+        
+        if not isinstance(background, np.ndarray):
+            return self.calibrator.get_clipped(self.record, copy=True, scale=self.processing_scale)
+        
+        if self.processing_scale != 1.0:
+            return cv2.resize(background, None, fx=self.processing_scale, fy=self.processing_scale,
+                              interpolation=cv2.INTER_AREA)
+        
+        return background.copy()
+    
+    def update_capture_roi(self):
+        """ Push calibrated area down to capture so that frames are cropped right after decoding. """
+        # Calibration needs full frames in the window, so cropping is only done without GUI.
+        if self.arguments.capture_roi and self.arguments.headless:
+            self.camera.set_roi(self.calibrator.capture_rect)
+    
+    def has_changed(self):
+        """ Check whether clipped area changed enough to be processed again. """
+        calibration = self.calibrator.clip_rect.expand() + self.calibrator.visibility_rect.expand()
+        
+        if self.calibrator.edit_mode or calibration != self.calibration:
+            self.calibration = calibration
+            self.pipeline.reset()
+            self.update_capture_roi()
+            
+            if self.motion_gate is not None:
+                self.motion_gate.reset()
+            
+            return True
+        
+        if self.results is None:
+            return True
+        
+        if self.quality is not None and not self.quality.should_process():
+            return False
+        
+        if self.motion_gate is None:
+            return True
+        
+        return self.motion_gate.check(self.calibrator.get_clipped(self.record))
+    
     def update(self, delta=None):
         super(CameraRunner, self).update()
-        _, self.frame, _ = self.camera_adapter.read()
-        clipped = self.calibrator.get_clipped(self.frame, copy=True)
-        transform = self.calibrator.transform_perspective(self.frame)
-        masked_frame = self.calibrator.get_masked(transform)
-        cv2.imshow('Masked frame', clipped)
-        self.calibrator.update(self.frame, True)
-        self.camera_adapter.update(self.frame)
-        
-        if isinstance(self.frame, np.ndarray):
-            cvui.imshow(Windows.MAIN.name, self.frame)
+        with profiler.span('read'):
+            record = self.camera_adapter.read()
+            self.record = record
+            self.frame = record.image
+        
+        with profiler.span('motion_gate'):
+            # Camera which was never reachable has no frame size yet.
+            has_changed = self.frame.size > 0 and self.has_changed()
+        
+        # Only processing is measured, waiting for the camera must not lower quality.
+        start_time = time.monotonic()
+        
+        if has_changed:
+            self.results = self.pipeline.run(record, self.sinks)
+            self.publish()
+        
+        if not self.arguments.headless and self.display.ready():
+            with profiler.span('show'):
+                self.show()
+        
+        if has_changed and self.quality is not None:
+            # Skipped frames cost next to nothing and would trigger recovery.
+            self.quality.record(time.monotonic() - start_time)
+        
+        self.track(record)
+    
+    def publish(self):
+        """ Pass computed outputs to the output callback. """
+        if self.on_output is None:
+            return
+        
+        for name in self.config['outputs']:
+            self.on_output(name, self.results[name])
+    
+    def show(self):
+        """ Composite overlays and push frames to the windows. """
+        for window, stage in (self.config['windows'].items() if self.results is not None else []):
+            image = image_of(self.pipeline.get(stage))
+            
+            if isinstance(image, np.ndarray) and image.size:
+                cv2.imshow(window, image)
+        
+        if not isinstance(self.frame, np.ndarray) or not self.frame.size:
+            return
+        
+        display = to_display(self.frame)
+        
+        if self.quality_level.overlays or self.calibrator.edit_mode:
+            overlay_key = self.calibrator.overlay_key, self.camera_adapter.overlay_key
+            self.overlay.render(display.shape, overlay_key, self.draw_overlay)
+            self.overlay.blend(display)
+            self.calibrator.update(display, True, draw_static=False)
+        
+        cvui.imshow(Windows.MAIN.name, display)
+    
+    def draw_overlay(self, layer):
+        """ Render static graphics into cached overlay layer. """
+        self.calibrator.draw_overlay(layer, True)
+        self.camera_adapter.draw_overlay(layer)
 
 
 if __name__ == '__main__':
-    CameraRunner().raw_run()
+    runner = CameraRunner()
+    
+    if runner.arguments.framerate:
+        runner.run()
+    else:
+        runner.raw_run()
@@ -0,0 +1,84 @@
+import argparse
+import time
+
+from cv2 import cv2
+
+from camera_utils.camera_web_buffered import BufferedWebCamera
+
+
+class OutageCapture:
+    def __init__(self, capture, frames=100, outage=None, hang_time=60.0):
+        """ Wrap video capture which fails ('fail') or blocks ('hang') after given number of frames. """
+        self.capture = capture
+        self.frames = frames
+        self.outage = outage
+        self.hang_time = hang_time
+        self.frame_count = 0
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        self.frame_time = 1 / fps if fps and fps > 0 else 1 / 25
+    
+    def get(self, prop):
+        return self.capture.get(prop)
+    
+    def set(self, prop, value):
+        return self.capture.set(prop, value)
+    
+    def isOpened(self):
+        return self.capture.isOpened()
+    
+    def read(self):
+        if self.outage is not None and self.frame_count >= self.frames:
+            if self.outage == 'hang':
+                time.sleep(self.hang_time)
+            
+            return False, None
+        
+        # Pace file playback like a live stream.
+        time.sleep(self.frame_time)
+        self.frame_count += 1
+        success, frame = self.capture.read()
+        
+        if not success:
+            # Loop video file.
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read()
+        
+        return success, frame
+    
+    def release(self):
+        self.capture.release()
+
+
+class OutageWebCamera(BufferedWebCamera):
+    def __init__(self, stream_uri, outages=('fail', 'hang'), frames=100, hang_time=60.0, **kwargs):
+        """ Buffered camera for local files or loopback streams, each opened capture gets next outage. """
+        self.outages = iter(outages)
+        self.frames = frames
+        self.hang_time = hang_time
+        super(OutageWebCamera, self).__init__(stream_uri, **kwargs)
+    
+    def open_capture(self):
+        return OutageCapture(self.open_source(), self.frames, next(self.outages, None), self.hang_time)
+    
+    def open_source(self):
+        """ Open wrapped capture, video file or loopback stream by default. """
+        return super(OutageWebCamera, self).open_capture()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate stream outages on a local video file.')
+    parser.add_argument('source', help='Path to the video file or loopback stream.')
+    parser.add_argument('--duration', help='Simulation length in seconds.', type=float, default=30)
+    parser.add_argument('--frames', help='Frames delivered before each outage.', type=int, default=50)
+    arguments = parser.parse_args()
+    camera = OutageWebCamera(arguments.source, frames=arguments.frames, hang_time=60, stall_timeout=2.0)
+    start_time = time.monotonic()
+    
+    while time.monotonic() - start_time < arguments.duration:
+        read_start = time.monotonic()
+        frame = camera.read()
+        read_time = time.monotonic() - read_start
+        print(f'{time.monotonic() - start_time:6.2f}s {frame} read: {read_time:.3f}s, stale: {camera.is_stale}, '
+              f'reconnects: {camera.reconnects}')
+    
+    camera.release()
@@ -0,0 +1,102 @@
+import time
+import unittest
+
+import numpy as np
+
+from outage import OutageWebCamera
+
+# Scheduling slack allowed on top of the read timeout.
+TOLERANCE = 0.1
+
+
+class SyntheticCapture:
+    def __init__(self, width=64, height=48, fps=100):
+        self.properties = {3: width, 4: height, 5: fps}
+        self.frame = np.zeros((height, width, 3), np.uint8)
+    
+    def get(self, prop):
+        return self.properties.get(prop, 0)
+    
+    def set(self, prop, value):
+        return False
+    
+    def isOpened(self):
+        return True
+    
+    def read(self):
+        return True, self.frame
+    
+    def release(self):
+        pass
+
+
+class SyntheticOutageCamera(OutageWebCamera):
+    def open_source(self):
+        return SyntheticCapture()
+
+
+class SlowOpenCamera(SyntheticOutageCamera):
+    def open_source(self):
+        # Stream which is unreachable at startup, like RTSP source waiting for open timeout.
+        time.sleep(1.0)
+        return SyntheticCapture()
+
+
+class OutageTest(unittest.TestCase):
+    def recover(self, camera, duration=5.0):
+        """ Read until a frame arrives after the first reconnect. Every read must return within timeout. """
+        start_time = time.monotonic()
+        
+        while time.monotonic() - start_time < duration:
+            read_start = time.monotonic()
+            frame = camera.read()
+            read_time = time.monotonic() - read_start
+            self.assertLess(read_time, camera.read_timeout + TOLERANCE, f'read() blocked for {read_time:.2f}s')
+            
+            if camera.reconnects > 0 and frame.success:
+                return frame
+        
+        self.fail(f'No frame after outage within {duration}s, reconnects: {camera.reconnects}.')
+    
+    def test_failed_read(self):
+        camera = SyntheticOutageCamera('synthetic', outages=('fail',), frames=5, read_timeout=0.2, stall_timeout=1.0,
+                                       min_backoff=0.1)
+        
+        try:
+            frame = self.recover(camera)
+        finally:
+            camera.release()
+        
+        self.assertEqual(camera.reconnects, 1)
+        self.assertEqual((camera.width, camera.height), (64, 48))
+        self.assertEqual(frame.image.shape, (48, 64, 3))
+    
+    def test_blocked_read(self):
+        camera = SyntheticOutageCamera('synthetic', outages=('hang',), frames=5, hang_time=10.0, read_timeout=0.2,
+                                       stall_timeout=0.5)
+        
+        try:
+            self.recover(camera)
+        finally:
+            camera.release()
+        
+        self.assertGreaterEqual(camera.reconnects, 1)
+    
+    def test_slow_open(self):
+        start_time = time.monotonic()
+        camera = SlowOpenCamera('synthetic', outages=(), read_timeout=0.2)
+        
+        try:
+            self.assertLess(time.monotonic() - start_time, TOLERANCE)
+            self.assertEqual((camera.width, camera.height), (0, 0))
+            self.assertFalse(camera.read().success)
+            time.sleep(1.0)
+            self.assertTrue(camera.read().success)
+        finally:
+            camera.release()
+        
+        self.assertEqual((camera.width, camera.height), (64, 48))
+
+
+if __name__ == '__main__':
+    unittest.main()
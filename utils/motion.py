@@ -0,0 +1,75 @@
+import numpy as np
+from cv2 import cv2
+
+
+class MotionGate:
+    def __init__(self, scale=0.1, pixel_threshold=25, enter_ratio=0.01, exit_ratio=0.005, hold_frames=15,
+                 refresh_interval=60):
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = exit_ratio
+        self.hold_frames = hold_frames
+        self.refresh_interval = refresh_interval
+        self.reference = None
+        self.is_moving = True
+        self.calm_frames = 0
+        self.skipped_frames = 0
+        self.changed_ratio = 0
+    
+    def reset(self):
+        """ Drop reference frame so the next check always passes. """
+        self.reference = None
+        self.is_moving = True
+        self.calm_frames = 0
+        self.skipped_frames = 0
+    
+    def downscale(self, frame):
+        """ Return small grayscale copy of the given frame. """
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        
+        if small.ndim == 3:
+            return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        
+        return small
+    
+    def check(self, frame):
+        """ Return True if frame differs enough from the last processed one and should be processed. """
+        if not isinstance(frame, np.ndarray) or frame.size == 0:
+            return True
+        
+        small = self.downscale(frame)
+        
+        if self.reference is None or self.reference.shape != small.shape:
+            self.reference = small
+            self.skipped_frames = 0
+            return True
+        
+        diff = cv2.absdiff(small, self.reference)
+        self.changed_ratio = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        self.update_state()
+        
+        if self.is_moving or 0 < self.refresh_interval <= self.skipped_frames + 1:
+            self.reference = small
+            self.skipped_frames = 0
+            return True
+        
+        self.skipped_frames += 1
+        return False
+    
+    def update_state(self):
+        """ Switch between moving and static states with hysteresis. """
+        if not self.is_moving:
+            self.is_moving = self.changed_ratio >= self.enter_ratio
+            self.calm_frames = 0
+            return
+        
+        if self.changed_ratio >= self.exit_ratio:
+            self.calm_frames = 0
+            return
+        
+        self.calm_frames += 1
+        
+        if self.calm_frames >= self.hold_frames:
+            self.is_moving = False
+            self.calm_frames = 0
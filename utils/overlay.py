@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+from cv2 import cv2
+
+
+def to_display(image):
+    """ Return BGR version of the frame for drawing colored graphics. Single channel frames are converted here only. """
+    if image.ndim == 2 or image.shape[2] == 1:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    
+    return image
+
+
+class OverlayLayer:
+    def __init__(self):
+        self.key = None
+        self.layer = None
+        self.mask = None
+        self.bounds = (0, 0, 0, 0)
+    
+    def render(self, shape, key, draw):
+        """ Redraw cached layer with draw(layer) only if key or frame shape has changed. """
+        shape = tuple(shape[:2]) + (3,)
+        
+        if self.layer is not None and self.key == key and self.layer.shape == shape:
+            return
+        
+        self.layer = np.zeros(shape, np.uint8)
+        draw(self.layer)
+        self.mask = np.any(self.layer != 0, axis=2)
+        self.bounds = cv2.boundingRect(self.mask.astype(np.uint8))
+        self.key = key
+    
+    def blend(self, frame):
+        """ Copy drawn pixels of the layer onto the frame in place. Only the area containing graphics is touched. """
+        x, y, w, h = self.bounds
+        
+        if self.layer is None or w == 0 or h == 0 or frame.shape[:2] != self.layer.shape[:2]:
+            return frame
+        
+        region = frame[y:y + h, x:x + w]
+        np.copyto(region, self.layer[y:y + h, x:x + w], where=self.mask[y:y + h, x:x + w, np.newaxis])
+        return frame
+
+
+class DisplayThrottle:
+    def __init__(self, max_fps=15):
+        self.interval = 1 / max_fps if max_fps else 0
+        self.last_time = None
+    
+    def ready(self):
+        """ Check whether enough time has passed since last displayed frame. """
+        now = time.monotonic()
+        
+        if self.last_time is not None and now - self.last_time < self.interval:
+            return False
+        
+        self.last_time = now
+        return True
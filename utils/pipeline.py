@@ -0,0 +1,110 @@
+import json
+from os import path
+
+from camera_utils.camera_frame import Frame
+from camera_utils.utils.profiler import profiler
+
+
+class Stage:
+    def __init__(self, name, function, inputs):
+        self.name = name
+        self.function = function
+        self.inputs = list(inputs)
+        # Stage function takes fixed number of arguments, configuration can only swap inputs.
+        self.arity = len(self.inputs)
+
+
+class Pipeline:
+    def __init__(self, source='frame'):
+        self.source = source
+        self.stages = {}
+        self.results = {}
+        self.key = None
+    
+    def add(self, name, function, inputs=None):
+        """ Register stage computing its output from outputs of given input stages. """
+        self.stages[name] = Stage(name, function, [self.source] if inputs is None else inputs)
+        return self
+    
+    def configure(self, stages):
+        """ Override stage inputs from configuration, e.g. {"encode": {"inputs": ["mask"]}}. """
+        for name, options in stages.items():
+            if name not in self.stages:
+                raise ValueError(f'Unknown pipeline stage "{name}".')
+            
+            if 'inputs' in options:
+                self.stages[name].inputs = list(options['inputs'])
+        
+        return self
+    
+    def validate(self, outputs):
+        """ Check that requested outputs exist, stages get as many inputs as they take and there are no cycles. """
+        visiting = set()
+        visited = {self.source}
+        
+        def visit(name):
+            if name in visited:
+                return
+            
+            if name in visiting:
+                raise ValueError(f'Pipeline stage "{name}" is part of a dependency cycle.')
+            
+            if name not in self.stages:
+                raise ValueError(f'Unknown pipeline stage "{name}".')
+            
+            stage = self.stages[name]
+            
+            if len(stage.inputs) != stage.arity:
+                raise ValueError(f'Pipeline stage "{name}" takes {stage.arity} input(s), got {len(stage.inputs)}.')
+            
+            visiting.add(name)
+            
+            for input_name in stage.inputs:
+                visit(input_name)
+            
+            visiting.remove(name)
+            visited.add(name)
+        
+        for output in outputs:
+            visit(output)
+    
+    def get(self, name):
+        """ Return stage output, computing it and its inputs only once per frame. """
+        if name in self.results:
+            return self.results[name]
+        
+        stage = self.stages[name]
+        inputs = [self.get(input_name) for input_name in stage.inputs]
+        
+        with profiler.span(name):
+            result = stage.function(*inputs)
+        
+        self.results[name] = result
+        return result
+    
+    def run(self, frame, outputs):
+        """ Compute requested outputs for the frame. Results are reused while frame sequence number is unchanged. """
+        key = (frame.source_id, frame.sequence) if isinstance(frame, Frame) else id(frame)
+        
+        if key != self.key:
+            self.key = key
+            # Source output is the record itself, so stages keep its capture offset.
+            self.results = {self.source: frame}
+        
+        return {name: self.get(name) for name in outputs}
+    
+    def reset(self):
+        """ Drop memoized results, e.g. after calibration has changed. """
+        self.key = None
+        self.results = {}
+
+
+def load_config(config_path, default):
+    """ Load JSON configuration file, falling back to default values for missing keys. """
+    config = dict(default)
+    
+    if path.exists(config_path):
+        with open(config_path, 'r') as file:
+            config.update(json.load(file))
+    
+    return config
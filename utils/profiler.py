@@ -0,0 +1,147 @@
+import cProfile
+import datetime
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *args):
+        self.profiler.add(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Sample:
+    __slots__ = ('profile',)
+    
+    def __init__(self, profile):
+        self.profile = profile
+    
+    def __enter__(self):
+        self.profile.enable()
+        return self
+    
+    def __exit__(self, *args):
+        self.profile.disable()
+        return False
+
+
+class Profiler:
+    def __init__(self, output_path='data/profiles', max_events=200000, sample_interval=30):
+        self.output_path = output_path
+        self.sample_interval = sample_interval
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.profile = None
+        self.ticks = 0
+    
+    def span(self, name):
+        """ Return context measuring named span. Does nothing while profiler is off. """
+        if not self.enabled:
+            return NULL_SPAN
+        
+        return Span(self, name)
+    
+    def sample(self):
+        """ Return context running cProfile for every n-th call (usually one frame) while profiler is on. """
+        if not self.enabled:
+            return NULL_SPAN
+        
+        self.ticks += 1
+        
+        if self.ticks % self.sample_interval != 0:
+            return NULL_SPAN
+        
+        return Sample(self.profile)
+    
+    def add(self, name, start, end):
+        """ Store finished span of the calling thread. """
+        thread = threading.current_thread()
+        self.thread_names[thread.ident] = thread.name
+        self.events.append((name, thread.ident, start, end))
+    
+    def start(self):
+        """ Start recording spans and sampled profile. """
+        if self.enabled:
+            return
+        
+        self.events.clear()
+        self.profile = cProfile.Profile()
+        self.ticks = 0
+        self.enabled = True
+        print('[PROFILER] Started.')
+    
+    def stop(self):
+        """ Stop recording and export collected data. """
+        if not self.enabled:
+            return
+        
+        self.enabled = False
+        self.export()
+        print('[PROFILER] Stopped.')
+    
+    def toggle(self):
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+    
+    def install_signal(self, signal_number=getattr(signal, 'SIGUSR1', None)):
+        """ Toggle profiler on given signal, for use in headless mode. """
+        if signal_number is None:
+            return
+        
+        signal.signal(signal_number, lambda *args: self.toggle())
+    
+    def export(self):
+        """ Write spans as Chrome trace-event JSON and sampled profile as pstats dump. Returns trace file path. """
+        if not os.path.exists(self.output_path):
+            os.makedirs(self.output_path)
+        
+        name = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        trace_path = os.path.join(self.output_path, f'trace-{name}.json')
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+                  for tid, thread_name in list(self.thread_names.items())]
+        
+        for span_name, tid, start, end in list(self.events):
+            events.append({'name': span_name, 'ph': 'X', 'pid': pid, 'tid': tid, 'ts': start / 1000,
+                           'dur': (end - start) / 1000})
+        
+        with open(trace_path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+        
+        if self.profile is not None:
+            self.profile.dump_stats(os.path.join(self.output_path, f'profile-{name}.prof'))
+        
+        print(f'[PROFILER] Exported {len(events)} events to {trace_path}.')
+        return trace_path
+
+
+profiler = Profiler()
@@ -0,0 +1,60 @@
+from collections import namedtuple
+
+QualityLevel = namedtuple('QualityLevel', 'scale overlays stride')
+
+DEFAULT_LADDER = (
+    QualityLevel(1.0, True, 1),
+    QualityLevel(0.75, True, 1),
+    QualityLevel(0.5, True, 1),
+    QualityLevel(0.5, False, 1),
+    QualityLevel(0.5, False, 2),
+    QualityLevel(0.5, False, 3),
+)
+
+
+class QualityController:
+    def __init__(self, target_time, ladder=DEFAULT_LADDER, smoothing=0.1, degrade_ratio=0.9, recover_ratio=0.6,
+                 cooldown=30):
+        self.target_time = target_time
+        self.ladder = ladder
+        self.smoothing = smoothing
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.cooldown = cooldown
+        self.index = 0
+        self.average_cost = None
+        self.frames_since_change = 0
+        self.frame_count = 0
+    
+    @property
+    def level(self):
+        """ Returns currently active quality level. """
+        return self.ladder[self.index]
+    
+    def should_process(self):
+        """ Check whether next frame should be processed at active frame stride. """
+        self.frame_count += 1
+        return self.frame_count % self.level.stride == 0
+    
+    def record(self, cost):
+        """ Feed processing time (in seconds) of the last processed frame and adjust quality level. """
+        self.frames_since_change += 1
+        
+        if self.average_cost is None:
+            self.average_cost = cost
+        else:
+            self.average_cost += self.smoothing * (cost - self.average_cost)
+        
+        if self.frames_since_change < self.cooldown:
+            return
+        
+        if self.average_cost > self.target_time * self.degrade_ratio and self.index < len(self.ladder) - 1:
+            self.set_index(self.index + 1)
+        elif self.average_cost < self.target_time * self.recover_ratio and self.index > 0:
+            self.set_index(self.index - 1)
+    
+    def set_index(self, index):
+        """ Switch to the given ladder step. """
+        self.index = index
+        self.frames_since_change = 0
+        print(f'[QUALITY] Switching to level {index}: {self.level}.')
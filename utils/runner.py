@@ -1,11 +1,17 @@
 import time
 from cv2 import cv2
 
+from camera_utils.camera_frame import FrameStats
+from camera_utils.utils.profiler import profiler
+from camera_utils.utils.quality import QualityController
+
 
 class Runner:
-    def __init__(self, framerate=60):
+    def __init__(self, framerate=60, adaptive_quality=False):
         self.wait_time = 1e9 / framerate
         self.catch_up_time = 0
+        self.quality = QualityController(1 / framerate) if adaptive_quality else None
+        self.frame_stats = FrameStats()
         self.is_running = False
         self.key = None
 
@@ -21,11 +27,23 @@ class Runner:
         """ Other processing """
         pass
 
+    def track(self, frame):
+        """ Account latency and drops of the frame record once its processing output is delivered. """
+        self.frame_stats.record(frame)
+
     def handle_input(self):
         """ Input processing """
         self.key = cv2.waitKey(1)
         pass
 
+    def tick(self, delta=None):
+        """ Process single frame. """
+        with profiler.span('handle_input'):
+            self.handle_input()
+
+        with profiler.span('update'):
+            self.update(delta)
+
     def run(self):
         """ Run at defined time step (fps). """
         self.is_running = True
@@ -37,15 +55,19 @@ class Runner:
             tick_length = now - last_loop_time
             last_loop_time = now
             delta = tick_length / self.wait_time
-            self.handle_input()
-            self.update(delta)
-            yield_time = ((last_loop_time - time.time_ns() + self.wait_time) / 1e9) + self.catch_up_time
+
+            with profiler.sample():
+                self.tick(delta)
+
+            processing_time = time.time_ns() - last_loop_time
+            yield_time = ((self.wait_time - processing_time) / 1e9) + self.catch_up_time
             self.catch_up_time = 0
 
             if yield_time > 0:
                 time.sleep(yield_time)
             else:
-                self.catch_up_time += yield_time
+                # Do not carry more than one frame of debt, otherwise overruns turn into unbounded latency.
+                self.catch_up_time = max(yield_time, -self.wait_time / 1e9)
 
         self.teardown()
     
@@ -55,8 +77,8 @@ class Runner:
         self.set_up()
 
         while self.is_running:
-            self.handle_input()
-            self.update()
+            with profiler.sample():
+                self.tick()
 
         self.teardown()
         